@@ -1,4 +1,6 @@
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Iterable, Optional
+from crosssituational.storage import AssociationStore
+import numpy as np
 
 
 class CrossSituationalLearner:
@@ -9,24 +11,40 @@ class CrossSituationalLearner:
     _beta: float
     _threshold: float
     _hypotheses: Dict[str, Dict[str, float]]
+    _cache_size: Optional[int]
+    _storage_dir: Optional[str]
 
     def __init__(
         self,
         lambda_smoothing: float = 0.01,
         beta: float = 100,
         tau_threshold: float = 0.09,
+        cache_size: Optional[int] = None,
+        storage_dir: Optional[str] = None,
     ):
-        """Initialize the model with the smmothing factor, beta, and threshold"""
+        """Initialize the model with the smmothing factor, beta, and threshold. If cache_size
+        is given, the associations are kept out of core in a memory-mapped file in storage_dir
+        (by default the system's temporary directory), holding about cache_size of them in
+        memory at once. The bound is kept by evicting whole meanings' columns, and the column
+        in use is never evicted, so one meaning with more than cache_size associations is
+        held whole. The results are identical to keeping them all in memory"""
         self._smoothing = lambda_smoothing
         self._beta = beta
         self._threshold = tau_threshold
+        self._cache_size = cache_size
+        self._storage_dir = storage_dir
         self._hypotheses = {}
 
+    def _conditional_probability(self, association: float, total: float) -> float:
+        """Get P(w|m) = [A(w, m) + lambda] / total, where total is
+        [sum for w’ in W (A(w’, m)) + beta*lambda]"""
+        return (self._smoothing + association) / total
+
     def _get_conditional_probability(self, word: str, meaning: str):
         """Get the conditional probability P(w|m) = [A(w, m) + lambda] /
         [sum for w’ in W (A(w’, m)) + beta*lambda]"""
-        # get A(w, m) + lambda; this is the numerator
-        numerator: float = self._smoothing + (
+        # get A(w, m), which is 0 if the word and meaning have never been associated
+        association: float = (
             self._hypotheses[word][meaning]
             if word in self._hypotheses and meaning in self._hypotheses[word]
             else 0
@@ -37,7 +55,13 @@ class CrossSituationalLearner:
             if meaning in self._hypotheses[word]:
                 denominator += self._hypotheses[word][meaning]
         # return the conditional probability P(w, m)
-        return numerator / denominator
+        return self._conditional_probability(association, denominator)
+
+    @staticmethod
+    def _alignments(probabilities: List[float]) -> List[float]:
+        """Get Alignment(w, m) = P(w|m) / [sum for m’ in MU (P(w|m’))] for each meaning
+        m in the scene, given their conditional probabilities"""
+        return [probability / sum(probabilities) for probability in probabilities]
 
     def _learn_from(self, word: str, objects: List[str]):
         """Learns from a given word and set of objects"""
@@ -49,32 +73,200 @@ class CrossSituationalLearner:
             self._get_conditional_probability(word, obj) for obj in objects
         ]
         # for each meaning m, increment its association by the alignment value
-        i: int = 0
-        while i < len(objects):
-            if objects[i] not in self._hypotheses[word]:
-                self._hypotheses[word][objects[i]] = 0
-            # increment association by Alignment(w, m) = P(w|m) / [sum for m’ in MU (P(w|m’))]
-            self._hypotheses[word][objects[i]] += probabilities[i] / sum(probabilities)
-            i += 1
-
-    def observe(self, curriculum: List[Tuple[str, List[str]]]):
-        """Observe and learn from the given curriculum"""
+        for obj, alignment in zip(objects, self._alignments(probabilities)):
+            if obj not in self._hypotheses[word]:
+                self._hypotheses[word][obj] = 0
+            self._hypotheses[word][obj] += alignment
+
+    def observe(
+        self,
+        curriculum: List[Tuple[str, List[str]]],
+        batch_size: Optional[int] = None,
+    ):
+        """Observe and learn from the given curriculum. By default every word is learned
+        sequentially; if batch_size is given, the curriculum is instead learned in
+        mini-batches of batch_size utterances, which trades exactness for speed (see
+        _observe_batched and measure_batch_drift)"""
+        if self._cache_size is not None:
+            if batch_size is not None:
+                raise ValueError("Mini-batch training isn't supported with out-of-core storage")
+            self._observe_stored(curriculum)
+            return
+        if batch_size is None:
+            self._observe_sequential(curriculum)
+        else:
+            self._observe_batched(curriculum, batch_size)
+        self._lexicalize()
+
+    def _observe_sequential(self, curriculum: List[Tuple[str, List[str]]]):
+        """Learn the associations from each instance in the curriculum in order"""
         # observe and learn from each instance in the curriculum
         for (language, objects) in curriculum:
             for word in language.split():
                 self._learn_from(word, objects)
-        final_hypotheses: Dict[str, Dict[str, float]] = {}
-        # update the hypotheses to contain only those that pass the threshold
+
+    def _observe_stored(self, curriculum: List[Tuple[str, List[str]]]):
+        """Learn the associations from each instance in the curriculum in order, as in
+        _observe_sequential, but keep them in an out-of-core AssociationStore, and then
+        update the hypotheses to contain only those that pass the threshold"""
+        store = AssociationStore(
+            self._beta * self._smoothing, self._storage_dir, self._cache_size
+        )
+        try:
+            # start from any associations we already have
+            for word in self._hypotheses:
+                word_index = store.index_word(word)
+                for meaning in self._hypotheses[word]:
+                    store.add(word_index, meaning, self._hypotheses[word][meaning])
+            for (language, objects) in curriculum:
+                for word in language.split():
+                    word_index = store.index_word(word)
+                    # get the conditional probabilities P(w|m) for each meaning m in the scene
+                    probabilities: List[float] = []
+                    for obj in objects:
+                        association = store.get(word_index, obj)
+                        probabilities.append(
+                            self._conditional_probability(
+                                association if association is not None else 0,
+                                store.total(obj),
+                            )
+                        )
+                    # for each meaning m, increment its association by the alignment value
+                    for obj, alignment in zip(objects, self._alignments(probabilities)):
+                        store.add(word_index, obj, alignment)
+            # keep the words in the order they were first seen, as the in-memory learner does,
+            # since that order is the order the totals are summed in if we observe again
+            entries = (
+                (word, meaning, self._conditional_probability(association, total))
+                for (word, meaning, association, total) in store.items()
+            )
+            passing = sorted(
+                (entry for entry in entries if entry[2] >= self._threshold),
+                key=lambda entry: store.index_word(entry[0]),
+            )
+            self._hypotheses = self._lexicalize_entries(passing)
+        finally:
+            store.close()
+
+    def _observe_batched(self, curriculum: List[Tuple[str, List[str]]], batch_size: int):
+        """Learn the associations in mini-batches of batch_size utterances. The alignments
+        for every word in a batch are computed against a snapshot of the associations
+        taken at the start of the batch, and then added to them, all at once with NumPy.
+        Larger batches drift further from the sequential learner, and even a batch of a
+        single utterance isn't exact when it has several words, since they share a snapshot"""
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, not {batch_size}")
+        # number the words in the order they are first seen, and the meanings
+        word_ids: Dict[str, int] = {}
+        meaning_ids: Dict[str, int] = {}
         for word in self._hypotheses:
+            word_ids.setdefault(word, len(word_ids))
             for meaning in self._hypotheses[word]:
-                conditional_probability = self._get_conditional_probability(
-                    word, meaning
-                )
-                if conditional_probability >= self._threshold:
-                    if word not in final_hypotheses:
-                        final_hypotheses[word] = {}
-                    final_hypotheses[word][meaning] = conditional_probability
-        self._hypotheses = final_hypotheses
+                meaning_ids.setdefault(meaning, len(meaning_ids))
+        # number each word occurrence, noting its utterance, and each utterance's objects
+        occurrence_words: List[int] = []
+        occurrence_utterances: List[int] = []
+        utterance_objects: List[int] = []
+        utterance_object_counts: List[int] = []
+        for utterance, (language, objects) in enumerate(curriculum):
+            words = language.split()
+            occurrence_words.extend(
+                [word_ids.setdefault(word, len(word_ids)) for word in words]
+            )
+            occurrence_utterances.extend([utterance] * len(words))
+            utterance_objects.extend(
+                [meaning_ids.setdefault(obj, len(meaning_ids)) for obj in objects]
+            )
+            utterance_object_counts.append(len(objects))
+        num_meanings: int = max(1, len(meaning_ids))
+        # expand the occurrences into a (word, meaning) pair for each object in their scenes
+        object_counts = np.array(utterance_object_counts, dtype=np.int64)
+        object_starts = np.concatenate([[0], np.cumsum(object_counts)[:-1]]).astype(np.int64)
+        utterances = np.array(occurrence_utterances, dtype=np.int64)
+        pair_counts = object_counts[utterances]
+        occurrences = np.repeat(np.arange(len(utterances), dtype=np.int64), pair_counts)
+        pair_starts = np.cumsum(pair_counts) - pair_counts
+        within = np.arange(len(occurrences), dtype=np.int64) - np.repeat(pair_starts, pair_counts)
+        meanings = np.array(utterance_objects, dtype=np.int64)[
+            np.repeat(object_starts[utterances], pair_counts) + within
+        ]
+        words = np.array(occurrence_words, dtype=np.int64)[occurrences]
+        # the association table: A(w, m) for each word * num_meanings + meaning, in the
+        # order of the keys, holding every pair we have or will see
+        known_keys = [
+            word_ids[word] * num_meanings + meaning_ids[meaning]
+            for word in self._hypotheses
+            for meaning in self._hypotheses[word]
+        ]
+        table_keys, slots = np.unique(
+            np.concatenate([np.array(known_keys, dtype=np.int64), words * num_meanings + meanings]),
+            return_inverse=True,
+        )
+        slots = slots.ravel()
+        values = np.zeros(len(table_keys))
+        values[slots[: len(known_keys)]] = [
+            value for word in self._hypotheses for value in self._hypotheses[word].values()
+        ]
+        pair_slots = slots[len(known_keys) :]
+        # sum for w' in W (A(w', m)) for each meaning
+        totals = np.bincount(
+            table_keys % num_meanings, weights=values, minlength=num_meanings
+        ).astype(float)
+        # the first pair of each batch of utterances
+        first_occurrences = np.searchsorted(
+            utterances, np.arange(0, len(curriculum) + batch_size, batch_size)
+        )
+        batch_starts = np.searchsorted(occurrences, first_occurrences).tolist()
+        for start, end in zip(batch_starts, batch_starts[1:]):
+            # batches of utterances without any words or objects have nothing to learn
+            if start >= end:
+                continue
+            batch_slots = pair_slots[start:end]
+            batch_meanings = meanings[start:end]
+            # get P(w|m) from the snapshot, and Alignment(w, m) =
+            # P(w|m) / [sum for m’ in MU (P(w|m’))] for each word occurrence
+            probabilities = self._conditional_probability(
+                values[batch_slots], totals[batch_meanings] + self._beta * self._smoothing
+            )
+            batch_occurrences = occurrences[start:end] - occurrences[start]
+            alignments = probabilities / np.bincount(
+                batch_occurrences, weights=probabilities
+            )[batch_occurrences]
+            np.add.at(values, batch_slots, alignments)
+            np.add.at(totals, batch_meanings, alignments)
+        # turn the table back into hypotheses, with the words in the order they were first seen
+        all_words: List[str] = list(word_ids)
+        all_meanings: List[str] = list(meaning_ids)
+        self._hypotheses = {word: {} for word in all_words}
+        for word_id, meaning_id, value in zip(
+            (table_keys // num_meanings).tolist(),
+            (table_keys % num_meanings).tolist(),
+            values.tolist(),
+        ):
+            self._hypotheses[all_words[word_id]][all_meanings[meaning_id]] = value
+
+    def _lexicalize(self):
+        """Update the hypotheses to contain only those that pass the threshold"""
+        self._hypotheses = self._lexicalize_entries(
+            [
+                (word, meaning, self._get_conditional_probability(word, meaning))
+                for word in self._hypotheses
+                for meaning in self._hypotheses[word]
+            ]
+        )
+
+    def _lexicalize_entries(
+        self, entries: Iterable[Tuple[str, str, float]]
+    ) -> Dict[str, Dict[str, float]]:
+        """Build the final hypotheses from (word, meaning, P(w|m)) entries, keeping
+        only those that pass the threshold"""
+        final_hypotheses: Dict[str, Dict[str, float]] = {}
+        for (word, meaning, conditional_probability) in entries:
+            if conditional_probability >= self._threshold:
+                if word not in final_hypotheses:
+                    final_hypotheses[word] = {}
+                final_hypotheses[word][meaning] = conditional_probability
+        return final_hypotheses
 
     def evaluate(self, gold_standard: List[Tuple[str, str]]) -> Tuple[float]:
         """Get the precision, recall, and f-score when comparing to the gold standard"""
@@ -92,3 +284,48 @@ class CrossSituationalLearner:
             precision + recall
         ) if precision + recall > 0 else 0
         return precision, recall, f_score
+
+
+def measure_batch_drift(
+    curriculum: List[Tuple[str, List[str]]],
+    batch_size: int,
+    lambda_smoothing: float = 0.01,
+    beta: float = 100,
+    tau_threshold: float = 0.09,
+) -> Tuple[float, float]:
+    """Measure how far the mini-batch learner drifts from the sequential learner on
+    the given curriculum. Returns the largest absolute difference in any association
+    A(w, m) and the fraction of the sequential lexicon's (word, meaning) pairs that
+    the mini-batch lexicon disagrees on"""
+    sequential = CrossSituationalLearner(lambda_smoothing, beta, tau_threshold)
+    sequential._observe_sequential(curriculum)
+    batched = CrossSituationalLearner(lambda_smoothing, beta, tau_threshold)
+    batched._observe_batched(curriculum, batch_size)
+    # compare the raw associations before lexicalization
+    max_difference: float = 0.0
+    for word in sequential._hypotheses:
+        for meaning in sequential._hypotheses[word]:
+            difference = abs(
+                sequential._hypotheses[word][meaning]
+                - batched._hypotheses.get(word, {}).get(meaning, 0)
+            )
+            max_difference = max(max_difference, difference)
+    # compare the final lexicons
+    sequential._lexicalize()
+    batched._lexicalize()
+    sequential_pairs = {
+        (word, meaning)
+        for word in sequential._hypotheses
+        for meaning in sequential._hypotheses[word]
+    }
+    batched_pairs = {
+        (word, meaning)
+        for word in batched._hypotheses
+        for meaning in batched._hypotheses[word]
+    }
+    disagreement: float = (
+        len(sequential_pairs ^ batched_pairs) / len(sequential_pairs)
+        if sequential_pairs
+        else 0.0
+    )
+    return max_difference, disagreement
@@ -1,6 +1,5 @@
-from crosssituational import CrossSituationalLearner
+from experiments.client import run_job
 from typing import Tuple
-from curricula import load_train_test_curricula
 
 
 def optimize_xsit() -> Tuple[int]:
@@ -11,12 +10,6 @@ def optimize_xsit() -> Tuple[int]:
     best_threshold = 0
     best_fscore = 0
 
-    # load in the curricula
-    print("Loading curricula...")
-    train_curriculum, train_verification, test_curriculum, test_verification = (
-        load_train_test_curricula()
-    )
-
     for beta in [10, 100, 1000]:
         for lamda in [0.1, 0.01, 0.001, 0.0001]:
             # test every value of the threshold from 0.5-1 in increments of 0.01
@@ -24,11 +17,16 @@ def optimize_xsit() -> Tuple[int]:
             while threshold < 1.0:
                 # get the average f score with these parameters over the instances
                 print(f"Testing {beta} {lamda} {threshold}")
-                learner = CrossSituationalLearner(
-                    lambda_smoothing=lamda, beta=beta, tau_threshold=threshold
-                )
-                learner.observe(train_curriculum)
-                precision, recall, f_score = learner.evaluate(train_verification)
+                job = {
+                    "learner": "xsit",
+                    "params": {
+                        "lambda_smoothing": lamda,
+                        "beta": beta,
+                        "tau_threshold": threshold,
+                    },
+                    "curriculum": "train",
+                }
+                f_score = list(run_job(job))[0]["f_score"]
                 # check to see if we've found a new maximum f_score, update if we have
                 if f_score > best_fscore:
                     best_fscore = f_score
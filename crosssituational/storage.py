@@ -0,0 +1,196 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+import mmap
+import tempfile
+
+# bytes per entry of each of a column's three arrays (word index, A(w, m), running total)
+_ENTRY_SIZE: int = 8
+# the smallest number of entries a column's slot in the file can hold
+_MIN_CAPACITY: int = 16
+
+
+class _Column:
+    """The associations A(w, m) for a single meaning m, ordered by the order in which
+    the words were first seen. Alongside each value we keep the running total of the
+    column up to and including that word, so the total for the meaning is summed in
+    exactly the same order as the in-memory learner sums it"""
+
+    words: array
+    values: array
+    totals: array
+    dirty: bool
+
+    def __init__(self, words: array, values: array, totals: array):
+        self.words = words
+        self.values = values
+        self.totals = totals
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+class AssociationStore:
+    """Out-of-core storage for the cross-situational association table A(w, m). Each
+    meaning's column of associations is kept in its own slot of a memory-mapped
+    scratch file created in directory. Columns are cached in memory, least recently
+    used first out, and changed columns are written back to the file in bulk, in file
+    order, when the cache holds more than cache_size associations. The most recently
+    used column is always kept, so cache_size bounds the other columns: a single
+    column with more than cache_size associations is held in memory whole.
+    The total for each meaning starts from total_offset, which the learner sets to
+    beta*lambda"""
+
+    _total_offset: float
+    _cache_size: int
+    _word_indices: Dict[str, int]
+    _words: List[str]
+    # for each meaning, (offset in the file, number of entries, capacity in entries)
+    _directory: Dict[str, Tuple[int, int, int]]
+    _cache: "OrderedDict[str, _Column]"
+    _cached_entries: int
+    _file_size: int
+    # the end of the last slot in the file
+    _end: int
+
+    def __init__(
+        self,
+        total_offset: float,
+        directory: Optional[str] = None,
+        cache_size: int = 1000000,
+    ):
+        self._total_offset = total_offset
+        self._cache_size = cache_size
+        self._word_indices = {}
+        self._words = []
+        self._directory = {}
+        self._cache = OrderedDict()
+        self._cached_entries = 0
+        # the scratch file is removed as soon as it is closed
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._file_size = 0
+        self._end = 0
+        self._map = None
+        self._grow(mmap.PAGESIZE)
+
+    def _grow(self, minimum_size: int):
+        """Grow the file (at least doubling it) and map it into memory again"""
+        if self._map is not None:
+            self._map.close()
+        self._file_size = max(minimum_size, 2 * self._file_size)
+        self._file.truncate(self._file_size)
+        self._map = mmap.mmap(self._file.fileno(), self._file_size)
+
+    def index_word(self, word: str) -> int:
+        """Get the index of a word, adding it after all known words if it is new"""
+        if word not in self._word_indices:
+            self._word_indices[word] = len(self._words)
+            self._words.append(word)
+        return self._word_indices[word]
+
+    def _column(self, meaning: str) -> _Column:
+        """Get the column for a meaning, reading it from the file if it isn't cached"""
+        if meaning in self._cache:
+            self._cache.move_to_end(meaning)
+            return self._cache[meaning]
+        words, values, totals = array("q"), array("d"), array("d")
+        if meaning in self._directory:
+            offset, length, capacity = self._directory[meaning]
+            start = offset
+            for column_array in (words, values, totals):
+                column_array.frombytes(self._map[start : start + length * _ENTRY_SIZE])
+                start += capacity * _ENTRY_SIZE
+        column = _Column(words, values, totals)
+        self._cache[meaning] = column
+        self._cached_entries += len(column)
+        self._evict()
+        return column
+
+    def get(self, word_index: int, meaning: str) -> Optional[float]:
+        """Get A(w, m), or None if the word and meaning have never been associated"""
+        column = self._column(meaning)
+        i = bisect_left(column.words, word_index)
+        if i < len(column) and column.words[i] == word_index:
+            return column.values[i]
+        return None
+
+    def total(self, meaning: str) -> float:
+        """Get total_offset + sum for w' in W (A(w', m))"""
+        column = self._column(meaning)
+        return column.totals[-1] if len(column) else self._total_offset
+
+    def add(self, word_index: int, meaning: str, value: float):
+        """Increment A(w, m) by value, adding the association if it doesn't exist yet"""
+        column = self._column(meaning)
+        i = bisect_left(column.words, word_index)
+        if i < len(column) and column.words[i] == word_index:
+            column.values[i] += value
+        else:
+            column.words.insert(i, word_index)
+            column.values.insert(i, value)
+            column.totals.insert(i, 0)
+            self._cached_entries += 1
+        # only the running totals from this word onwards change
+        total = column.totals[i - 1] if i > 0 else self._total_offset
+        for j in range(i, len(column)):
+            total += column.values[j]
+            column.totals[j] = total
+        column.dirty = True
+        self._evict()
+
+    def _evict(self):
+        """If the cache is over its size, drop the least recently used columns until it
+        is back down to three quarters of its size (or only the most recently used
+        column is left), writing back the changed ones"""
+        if self._cached_entries <= self._cache_size:
+            return
+        evicted: List[Tuple[str, _Column]] = []
+        # always keep the most recently used column, which the learner is working on
+        while self._cached_entries > 0.75 * self._cache_size and len(self._cache) > 1:
+            meaning, column = self._cache.popitem(last=False)
+            self._cached_entries -= len(column)
+            evicted.append((meaning, column))
+        self._write_back([(m, c) for (m, c) in evicted if c.dirty])
+
+    def _write_back(self, columns: List[Tuple[str, _Column]]):
+        """Write the given columns to their slots in the file, moving any that have
+        outgrown their slot to a new slot at the end of the file"""
+        slots: List[Tuple[int, int, _Column]] = []
+        for meaning, column in columns:
+            offset, _, capacity = self._directory.get(meaning, (0, 0, 0))
+            if len(column) > capacity:
+                offset = self._end
+                capacity = max(_MIN_CAPACITY, 2 * len(column))
+                self._end += 3 * capacity * _ENTRY_SIZE
+            self._directory[meaning] = (offset, len(column), capacity)
+            slots.append((offset, capacity, column))
+        if self._end > self._file_size:
+            self._grow(self._end)
+        # write the columns in file order so the writes are sequential
+        for offset, capacity, column in sorted(slots, key=lambda slot: slot[0]):
+            start = offset
+            for column_array in (column.words, column.values, column.totals):
+                data = column_array.tobytes()
+                self._map[start : start + len(data)] = data
+                start += capacity * _ENTRY_SIZE
+            column.dirty = False
+
+    def items(self) -> Iterator[Tuple[str, str, float, float]]:
+        """Iterate over every association as (word, meaning, A(w, m), total for m)"""
+        meanings = list(self._directory) + [
+            m for m in self._cache if m not in self._directory
+        ]
+        for meaning in meanings:
+            column = self._column(meaning)
+            total = self.total(meaning)
+            for word_index, value in zip(column.words, column.values):
+                yield self._words[word_index], meaning, value, total
+
+    def close(self):
+        """Release the memory map and remove the scratch file"""
+        self._cache.clear()
+        self._cached_entries = 0
+        self._map.close()
+        self._file.close()
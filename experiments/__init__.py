@@ -0,0 +1,140 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from multiprocessing import Pool
+import inspect
+import random
+from curricula import load_rollins, load_train_test_curricula
+from crosssituational import CrossSituationalLearner
+from proposebutverify import PbvLearner, shard_pool
+from pursuit import PursuitLearner
+
+# the learners that can be run as experiments, and the training options each accepts
+LEARNERS: Dict[str, type] = {
+    "pbv": PbvLearner,
+    "pursuit": PursuitLearner,
+    "xsit": CrossSituationalLearner,
+}
+OBSERVE_OPTIONS: Dict[str, List[str]] = {
+    "pbv": ["num_shards"],
+    "pursuit": [],
+    "xsit": ["batch_size"],
+}
+
+# curricula loaded in this process, keyed by name, as (curriculum, gold standard) pairs
+_curricula: Dict[str, Tuple] = {}
+
+
+def get_curriculum(name: str) -> Tuple:
+    """Get the named curriculum ("rollins", "train", or "test") and its gold standard,
+    parsing the curricula only the first time they are needed in this process"""
+    if not _curricula:
+        rollins, gold = load_rollins()
+        train_curriculum, train_verification, test_curriculum, test_verification = (
+            load_train_test_curricula()
+        )
+        _curricula["rollins"] = (rollins, gold)
+        _curricula["train"] = (train_curriculum, train_verification)
+        _curricula["test"] = (test_curriculum, test_verification)
+    return _curricula[name]
+
+
+# the most recently shuffled curriculum in this process, keyed by (name, shuffle seed)
+_shuffled: Dict[Tuple, List] = {}
+
+
+def get_job_curriculum(key: Tuple[str, Optional[int]]) -> List:
+    """Get the curriculum for a job from its (curriculum name, shuffle seed) key,
+    shuffling a copy of it with the seed if there is one so that every replicate and
+    every shard worker sees the same order"""
+    name, shuffle_seed = key
+    curriculum, _ = get_curriculum(name)
+    if shuffle_seed is None:
+        return curriculum
+    if key not in _shuffled:
+        _shuffled.clear()
+        shuffled = list(curriculum)
+        random.Random(shuffle_seed).shuffle(shuffled)
+        _shuffled[key] = shuffled
+    return _shuffled[key]
+
+
+def validate_job(job: Dict):
+    """Check that an experiment job is well formed. A job is a dictionary with a
+    learner name, the curriculum to train on, the number of replicates, and optionally
+    the learner's params, its observe options, and a seed used to shuffle the curriculum"""
+    if not isinstance(job, dict):
+        raise ValueError(f"A job must be a dictionary, not {type(job).__name__}")
+    if not _is_positive_integer(job.get("replicates", 1)):
+        raise ValueError(
+            f"replicates must be an integer of at least 1, not {job['replicates']!r}"
+        )
+    shuffle_seed = job.get("shuffle_seed")
+    if shuffle_seed is not None and (
+        not isinstance(shuffle_seed, int) or isinstance(shuffle_seed, bool)
+    ):
+        raise ValueError(f"shuffle_seed must be an integer or null, not {shuffle_seed!r}")
+    for field in ["params", "options"]:
+        if not isinstance(job.get(field, {}), dict):
+            raise ValueError(f"{field} must be a dictionary")
+    if job.get("learner") not in LEARNERS:
+        raise ValueError(f"Unknown learner: {job.get('learner')}")
+    if job.get("curriculum", "rollins") not in ["rollins", "train", "test"]:
+        raise ValueError(f"Unknown curriculum: {job.get('curriculum')}")
+    parameters = inspect.signature(LEARNERS[job["learner"]].__init__).parameters
+    for param in job.get("params", {}):
+        if param == "self" or param not in parameters:
+            raise ValueError(f"Unknown param for {job['learner']}: {param}")
+    for option, value in job.get("options", {}).items():
+        if option not in OBSERVE_OPTIONS[job["learner"]]:
+            raise ValueError(f"Unknown option for {job['learner']}: {option}")
+        if not _is_positive_integer(value):
+            raise ValueError(f"{option} must be an integer of at least 1, not {value!r}")
+
+
+def _is_positive_integer(value: Any) -> bool:
+    """Whether a value from a job is an integer (and not a boolean) of at least 1"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
+def parallelizes_internally(job: Dict) -> bool:
+    """Whether a single replicate of the job starts its own worker processes"""
+    options = job.get("options", {})
+    return options.get("num_shards", 1) > 1
+
+
+def run_replicate(job: Dict, pool: Optional[Pool] = None) -> Dict[str, float]:
+    """Train and evaluate a single replicate of the job, returning its precision,
+    recall, and f-score. A sharded PbV learner uses the given pool, started with
+    shard_pool(get_job_curriculum), for its shards"""
+    key = (job.get("curriculum", "rollins"), job.get("shuffle_seed"))
+    curriculum = get_job_curriculum(key)
+    _, gold_standard = get_curriculum(key[0])
+    learner = LEARNERS[job["learner"]](**job.get("params", {}))
+    options = job.get("options", {})
+    if "num_shards" in options:
+        learner.observe_sharded(
+            curriculum, num_shards=options["num_shards"], pool=pool, curriculum_key=key
+        )
+    else:
+        learner.observe(curriculum, **options)
+    precision, recall, f_score = learner.evaluate(gold_standard)
+    return {"precision": precision, "recall": recall, "f_score": f_score}
+
+
+def run_job_locally(job: Dict, pool: Optional[Pool] = None) -> Iterator[Dict[str, float]]:
+    """Run every replicate of the job in this process, yielding each result as it finishes.
+    A sharded job uses the given pool, started with shard_pool(get_job_curriculum), or
+    else starts one for the job and reuses it for every replicate"""
+    validate_job(job)
+    num_shards = job.get("options", {}).get("num_shards", 1)
+    own_pool = None
+    if pool is None and num_shards > 1:
+        own_pool = shard_pool(get_job_curriculum, num_shards)
+    try:
+        for i in range(job.get("replicates", 1)):
+            result = run_replicate(job, pool or own_pool)
+            result["replicate"] = i
+            yield result
+    finally:
+        if own_pool is not None:
+            own_pool.close()
+            own_pool.join()
@@ -0,0 +1,46 @@
+from typing import Dict, Iterator, Optional
+import json
+import os
+import socket
+from experiments import run_job_locally
+from experiments.server import default_socket_path
+
+
+def _check_owner(socket_path: str):
+    """Make sure the socket belongs to this user before trusting it with a job"""
+    if os.stat(socket_path).st_uid != os.getuid():
+        raise RuntimeError(f"{socket_path} belongs to another user")
+
+
+def submit(job: Dict, socket_path: Optional[str] = None) -> Iterator[Dict[str, float]]:
+    """Submit a job to a running experiment server, yielding each replicate's result
+    as the server streams it back"""
+    if socket_path is None:
+        socket_path = default_socket_path()
+    _check_owner(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall((json.dumps(job) + "\n").encode())
+        for line in connection.makefile("r"):
+            message = json.loads(line)
+            if "error" in message:
+                raise RuntimeError(message["error"])
+            if message.get("done"):
+                return
+            yield message
+    raise RuntimeError("The experiment server closed the connection before the job finished")
+
+
+def run_job(job: Dict, socket_path: Optional[str] = None) -> Iterator[Dict[str, float]]:
+    """Run a job on the experiment server if one is listening on socket_path (by
+    default, the current user's socket), and otherwise run it in this process"""
+    if socket_path is None:
+        socket_path = default_socket_path()
+    try:
+        _check_owner(socket_path)
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+        connection.close()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return run_job_locally(job)
+    return submit(job, socket_path)
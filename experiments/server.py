@@ -0,0 +1,143 @@
+from typing import Dict, Optional, Tuple
+from multiprocessing import Pool
+import json
+import os
+import random
+import socket
+import socketserver
+import stat
+import tempfile
+from experiments import (
+    get_curriculum,
+    get_job_curriculum,
+    parallelizes_internally,
+    run_job_locally,
+    run_replicate,
+    validate_job,
+)
+from proposebutverify import shard_pool
+
+
+def default_socket_path() -> str:
+    """Get the socket path for the current user's experiment server. This is in
+    $XDG_RUNTIME_DIR if it is set, and otherwise in a directory in the temporary
+    directory that only the user can access, so that no other user can take the
+    socket over and answer (or see) the user's jobs"""
+    runtime_directory = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_directory:
+        return os.path.join(runtime_directory, "locating-word-referents.sock")
+    directory = os.path.join(
+        tempfile.gettempdir(), f"locating-word-referents-{os.getuid()}"
+    )
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    status = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(status.st_mode)
+        or status.st_uid != os.getuid()
+        or stat.S_IMODE(status.st_mode) & 0o077
+    ):
+        raise RuntimeError(f"{directory} must be a directory only this user can access")
+    return os.path.join(directory, "experiments.sock")
+
+
+def _initialize_worker():
+    """Give each worker its own random state and load the curricula up front"""
+    random.seed()
+    get_curriculum("rollins")
+
+
+def _run_indexed_replicate(indexed_job: Tuple[int, Dict]) -> Dict[str, float]:
+    """Run a replicate in a worker and tag the result with its index"""
+    i, job = indexed_job
+    result = run_replicate(job)
+    result["replicate"] = i
+    return result
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Handles a single connection: reads one JSON job line and streams back one JSON
+    line per replicate, followed by a final line marking the job as done"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        # clients may connect without sending a job just to check that the server is up
+        if not line:
+            return
+        try:
+            job = json.loads(line)
+            validate_job(job)
+            sharded = parallelizes_internally(job)
+        except Exception as e:
+            self._send({"error": f"Invalid job: {e}"})
+            return
+        indexed_jobs = [(i, job) for i in range(job.get("replicates", 1))]
+        # replicates that start their own processes can't run in the (daemonic) pool
+        # workers, so they run here and send their shards to the warm shard pool
+        if sharded:
+            results = run_job_locally(job, self.server.shard_pool)
+        else:
+            results = self.server.pool.imap_unordered(_run_indexed_replicate, indexed_jobs)
+        try:
+            for result in results:
+                self._send(result)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client went away, so there is no one to report to
+            return
+        except Exception as e:
+            self._send({"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send({"done": True})
+
+    def _send(self, message: Dict):
+        self.wfile.write((json.dumps(message) + "\n").encode())
+        self.wfile.flush()
+
+
+class ExperimentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A long-lived experiment service listening on a Unix socket. It keeps the parsed
+    curricula resident, along with a pool of warm worker processes for replicates and
+    another for the shards of sharded PbV replicates, so that each job only pays for
+    its own compute"""
+
+    daemon_threads = True
+    pool: Pool
+    shard_pool: Pool
+
+    def __init__(self, socket_path: Optional[str] = None, num_processes: Optional[int] = None):
+        if socket_path is None:
+            socket_path = default_socket_path()
+        # remove a stale socket left behind by a previous server, but never a live one
+        if os.path.exists(socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                    connection.connect(socket_path)
+            except ConnectionRefusedError:
+                os.remove(socket_path)
+            else:
+                raise RuntimeError(f"An experiment server is already listening on {socket_path}")
+        # start the shard pool first so its workers don't inherit the other pool's
+        self.shard_pool = shard_pool(get_job_curriculum, num_processes)
+        self.pool = Pool(processes=num_processes, initializer=_initialize_worker)
+        get_curriculum("rollins")
+        super().__init__(socket_path, _JobHandler)
+
+    def server_close(self):
+        super().server_close()
+        for pool in [self.pool, self.shard_pool]:
+            pool.close()
+            pool.join()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def serve(socket_path: Optional[str] = None, num_processes: Optional[int] = None):
+    """Run the experiment server until interrupted"""
+    with ExperimentServer(socket_path, num_processes) as server:
+        print(f"Serving experiments on {server.server_address}...")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
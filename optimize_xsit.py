@@ -1,6 +1,5 @@
 from crosssituational.optimize import optimize_xsit
-from crosssituational import CrossSituationalLearner
-from curricula import load_train_test_curricula
+from experiments.client import run_job
 
 # get the optimized paramters
 print("Getting optimized parameters for the cross-situational learner...")
@@ -10,28 +9,22 @@ print(f"\nBest parameters: {best_beta}, {best_lamda}, {best_threshold}")
 print(
     f"Running cross-situational experiment with beta={best_beta}, lamda={best_lamda}, threshold={best_threshold}"
 )
-
-# load in the training and testing data
-train_curriculum, train_verification, test_curriculum, test_verification = (
-    load_train_test_curricula()
-)
+params = {
+    "beta": best_beta,
+    "lambda_smoothing": best_lamda,
+    "tau_threshold": best_threshold,
+}
 
 # test on the training curricula first
-learner = CrossSituationalLearner(
-    beta=best_beta, lambda_smoothing=best_lamda, tau_threshold=best_threshold
-)
-learner.observe(train_curriculum)
-train_precision, train_recall, train_f = learner.evaluate(train_verification)
+result = list(run_job({"learner": "xsit", "params": params, "curriculum": "train"}))[0]
+train_precision, train_recall, train_f = result["precision"], result["recall"], result["f_score"]
 print(
     f"\t Training average precision: {train_precision}, recall: {train_recall}, f-score: {train_f}"
 )
 
 # now on the testing curricula
-learner = CrossSituationalLearner(
-    beta=best_beta, lambda_smoothing=best_lamda, tau_threshold=best_threshold
-)
-learner.observe(test_curriculum)
-test_precision, test_recall, test_f = learner.evaluate(test_verification)
+result = list(run_job({"learner": "xsit", "params": params, "curriculum": "test"}))[0]
+test_precision, test_recall, test_f = result["precision"], result["recall"], result["f_score"]
 print(
     f"\t Testing average precision: {test_precision}, recall: {test_recall}, f-score: {test_f}"
 )
@@ -1,5 +1,9 @@
-from typing import List, Tuple, Dict
+from typing import Callable, Hashable, List, Tuple, Dict, Optional, Set
+from functools import partial
+from multiprocessing import Pool
+import os
 import random
+import zlib
 
 
 class PbvLearner:
@@ -43,18 +47,91 @@ class PbvLearner:
         before"""
         self._hypotheses[word] = random.choice(objects)
 
+    def _learn_word(self, word: str, objects: List[str]):
+        """Learn from a single occurrence of a word in a scene with the given objects"""
+        # if there is already a hypothesis, verify it
+        if word in self._hypotheses:
+            # keep track of if this is the first time we're verifying or not
+            self._verify_meaning(word, objects)
+        # otherwise, select an object at random
+        else:
+            self._select_meaning(word, objects)
+
     def observe(self, curriculum: List[Tuple[str, List[str]]]):
         """Observe and learn from the given curriculum"""
         for (language, objects) in curriculum:
             # try to learn a meaning for each word
             for word in language.split():
-                # if there is already a hypothesis, verify it
-                if word in self._hypotheses:
-                    # keep track of if this is the first time we're verifying or not
-                    self._verify_meaning(word, objects)
-                # otherwise, select an object at random
-                else:
-                    self._select_meaning(word, objects)
+                self._learn_word(word, objects)
+
+    def observe_sharded(
+        self,
+        curriculum: List[Tuple[str, List[str]]],
+        num_shards: Optional[int] = None,
+        seed: Optional[int] = None,
+        pool: Optional[Pool] = None,
+        curriculum_key: Hashable = None,
+    ):
+        """Observe and learn from the given curriculum by partitioning the vocabulary
+        into num_shards shards (defaulting to the number of cores) by a stable hash of
+        each word, and learning each shard in a worker process. Each word's hypothesis
+        depends only on the scenes it occurs in, so the merged lexicon follows the same
+        distribution as observe, although each shard draws from its own random stream.
+        Every worker scans the whole curriculum and skips the words outside its shard,
+        so this process only partitions the existing lexicon and merges the results.
+        The workers come from pool, which must have been started with shard_pool and
+        can look up the curriculum from curriculum_key; without a pool, a new one is
+        started for this call. A single shard is learned in this process"""
+        if num_shards is None:
+            num_shards = os.cpu_count() or 1
+        if pool is not None and curriculum_key is None:
+            raise ValueError("A curriculum_key is needed to learn from a shard pool")
+        # give each shard an independent random stream and the state it already has
+        seed_generator = random.Random(seed)
+        seeds: List[int] = [seed_generator.getrandbits(64) for _ in range(num_shards)]
+        if num_shards == 1:
+            # learn in this process, leaving the caller's random state as it was
+            state = random.getstate()
+            random.seed(seeds[0])
+            try:
+                self.observe(curriculum)
+            finally:
+                random.setstate(state)
+            return
+        shard_hypotheses: List[Dict[str, str]] = [{} for _ in range(num_shards)]
+        shard_verified: List[Set[str]] = [set() for _ in range(num_shards)]
+        for word, meaning in self._hypotheses.items():
+            shard = _shard_of(word, num_shards)
+            shard_hypotheses[shard][word] = meaning
+            if word in self._verified:
+                shard_verified[shard].add(word)
+        jobs = [
+            (
+                self._alpha,
+                self._alpha_naught,
+                curriculum_key,
+                shard,
+                num_shards,
+                seeds[shard],
+                shard_hypotheses[shard],
+                shard_verified[shard],
+            )
+            for shard in range(num_shards)
+        ]
+        if pool is not None:
+            results = pool.map(_observe_shard, jobs)
+        else:
+            with shard_pool(partial(_given_curriculum, curriculum), num_shards) as new_pool:
+                results = new_pool.map(_observe_shard, jobs)
+        # every word we already knew went to exactly one shard, so the shards' lexicons
+        # and verified words together replace ours
+        hypotheses: Dict[str, str] = {}
+        verified: Set[str] = set()
+        for (learned_hypotheses, learned_verified) in results:
+            hypotheses.update(learned_hypotheses)
+            verified.update(learned_verified)
+        self._hypotheses = hypotheses
+        self._verified = verified
 
     def evaluate(self, gold_standard: List[Tuple[str, str]]) -> Tuple[float]:
         """Get the precision, recall, and f-score when comparing to the gold standard"""
@@ -68,3 +145,64 @@ class PbvLearner:
         recall: float = correct / len(gold_standard)
         f_score: float = 2 * (precision * recall) / (precision + recall)
         return precision, recall, f_score
+
+
+# in a shard worker, the function that looks up a curriculum from its curriculum_key
+_load_curriculum: Optional[Callable[[Hashable], List[Tuple[str, List[str]]]]] = None
+
+
+def _shard_of(word: str, num_shards: int) -> int:
+    """Get the shard a word belongs to, using a hash that is the same in every process"""
+    return zlib.crc32(word.encode("utf-8")) % num_shards
+
+
+def _given_curriculum(
+    curriculum: List[Tuple[str, List[str]]], curriculum_key: Hashable
+) -> List[Tuple[str, List[str]]]:
+    """Look up the one curriculum a pool started by observe_sharded learns from"""
+    return curriculum
+
+
+def _initialize_shard_worker(
+    load_curriculum: Callable[[Hashable], List[Tuple[str, List[str]]]]
+):
+    """Give a shard worker its own random state and the function to look up curricula"""
+    global _load_curriculum
+    _load_curriculum = load_curriculum
+    random.seed()
+
+
+def shard_pool(
+    load_curriculum: Callable[[Hashable], List[Tuple[str, List[str]]]],
+    processes: Optional[int] = None,
+) -> Pool:
+    """Start a pool of workers for observe_sharded. The workers look up the curriculum
+    to learn from by calling load_curriculum with the curriculum_key given to
+    observe_sharded, so curricula are never sent with the tasks. load_curriculum is
+    passed to each worker once, when it starts"""
+    return Pool(
+        processes=processes,
+        initializer=_initialize_shard_worker,
+        initargs=(load_curriculum,),
+    )
+
+
+def _observe_shard(
+    job: Tuple[float, float, Hashable, int, int, int, Dict[str, str], Set[str]]
+) -> Tuple[Dict[str, str], Set[str]]:
+    """Learn a single shard of the vocabulary in a worker process, starting from the
+    shard's existing hypotheses and verified words, and return them once learned"""
+    alpha, alpha_naught, curriculum_key, shard, num_shards, seed, hypotheses, verified = job
+    random.seed(seed)
+    learner = PbvLearner(alpha=alpha, alpha_naught=alpha_naught)
+    learner._hypotheses = hypotheses
+    learner._verified = verified
+    # remember which words are in the shard so each word is only hashed once
+    in_shard: Dict[str, bool] = {}
+    for (language, objects) in _load_curriculum(curriculum_key):
+        for word in language.split():
+            if word not in in_shard:
+                in_shard[word] = _shard_of(word, num_shards) == shard
+            if in_shard[word]:
+                learner._learn_word(word, objects)
+    return learner._hypotheses, learner._verified
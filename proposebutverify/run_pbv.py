@@ -1,34 +1,40 @@
-from proposebutverify import PbvLearner
-from curricula import load_train_test_curricula
+from experiments.client import run_job
 
 
-def run_pbv(num_iterations: int = 1000,):
+def run_pbv(num_iterations: int = 1000, num_shards: int = 1):
     """Runs num_iterations of the propose-but-verify learner and prints out the
-    precision, recall, and f-score for the training and testing data"""
-    train_curriculum, train_verification, test_curriculum, test_verification = (
-        load_train_test_curricula()
-    )
+    precision, recall, and f-score for the training and testing data. If num_shards
+    is greater than 1, each learner is trained with observe_sharded across that
+    many worker processes"""
+    options = {"num_shards": num_shards} if num_shards > 1 else {}
     train_precision = 0
     train_recall = 0
     train_f_score = 0
     test_precision = 0
     test_recall = 0
     test_f_score = 0
-    for i in range(num_iterations):
-        # train and evaluate the learner on the training data
-        learner = PbvLearner()
-        learner.observe(train_curriculum)
-        p, r, f = learner.evaluate(train_verification)
-        train_precision += p
-        train_recall += r
-        train_f_score += f
-        # train and evaluate the learner on the testing data
-        learner = PbvLearner()
-        learner.observe(test_curriculum)
-        p, r, f = learner.evaluate(test_verification)
-        test_precision += p
-        test_recall += r
-        test_f_score += f
+    # train and evaluate the learner on the training data
+    train_job = {
+        "learner": "pbv",
+        "options": options,
+        "curriculum": "train",
+        "replicates": num_iterations,
+    }
+    for result in run_job(train_job):
+        train_precision += result["precision"]
+        train_recall += result["recall"]
+        train_f_score += result["f_score"]
+    # train and evaluate the learner on the testing data
+    test_job = {
+        "learner": "pbv",
+        "options": options,
+        "curriculum": "test",
+        "replicates": num_iterations,
+    }
+    for result in run_job(test_job):
+        test_precision += result["precision"]
+        test_recall += result["recall"]
+        test_f_score += result["f_score"]
     # average the precision, recall, and f-score for both training and testing
     train_precision = train_precision / num_iterations
     train_recall = train_recall / num_iterations
@@ -1,5 +1,4 @@
-from pursuit import PursuitLearner
-from curricula import load_train_test_curricula
+from experiments.client import run_job
 from typing import Tuple
 
 
@@ -12,12 +11,6 @@ def optimize_pursuit(sample: bool, num_samples: int) -> Tuple[float]:
     best_threshold = 0
     best_fscore = 0
 
-    # load in the curricula
-    print("Loading curricula...")
-    train_curriculum, train_verification, test_curriculum, test_verification = (
-        load_train_test_curricula()
-    )
-
     # possible gamma and lambda values as defined in Stevens et al. 2017
     for gamma in [0.01, 0.02, 0.05, 0.1]:
         for lamda in [0.1, 0.01, 0.001, 0.0001]:
@@ -26,17 +19,20 @@ def optimize_pursuit(sample: bool, num_samples: int) -> Tuple[float]:
             while threshold < 1.0:
                 # get the average f score with these parameters over the instances
                 print(f"Testing {gamma} {lamda} {threshold}")
+                job = {
+                    "learner": "pursuit",
+                    "params": {
+                        "gamma_learning_rate": gamma,
+                        "lambda_smoothing": lamda,
+                        "tau_lexicalization": threshold,
+                        "sample": sample,
+                    },
+                    "curriculum": "train",
+                    "replicates": num_samples,
+                }
                 f_score = 0
-                for i in range(num_samples):
-                    learner = PursuitLearner(
-                        gamma_learning_rate=gamma,
-                        lambda_smoothing=lamda,
-                        tau_lexicalization=threshold,
-                        sample=sample,
-                    )
-                    learner.observe(train_curriculum)
-                    precision, recall, f = learner.evaluate(train_verification)
-                    f_score += f
+                for result in run_job(job):
+                    f_score += result["f_score"]
                 f_score = f_score / num_samples
                 # check to see if we've found a new maximum f_score, update if we have
                 if f_score > best_fscore:
@@ -58,40 +54,40 @@ def run_pursuit_experiment(
 ):
     """Runs num_iterations of the pursuit learner and prints out the
     precision, recall, and f-score for the training and testing data"""
-    train_curriculum, train_verification, test_curriculum, test_verification = (
-        load_train_test_curricula()
-    )
+    params = {
+        "gamma_learning_rate": gamma_learning_rate,
+        "lambda_smoothing": lambda_smothing,
+        "tau_lexicalization": threshold,
+        "sample": pursuit_sampling,
+    }
     train_precision = 0
     train_recall = 0
     train_f_score = 0
     test_precision = 0
     test_recall = 0
     test_f_score = 0
-    for i in range(num_iterations):
-        # train and evaluate the learner on the training data
-        learner = PursuitLearner(
-            gamma_learning_rate=gamma_learning_rate,
-            lambda_smoothing=lambda_smothing,
-            tau_lexicalization=threshold,
-            sample=pursuit_sampling,
-        )
-        learner.observe(train_curriculum)
-        p, r, f = learner.evaluate(train_verification)
-        train_precision += p
-        train_recall += r
-        train_f_score += f
-        # train and evaluate the learner on the testing data
-        learner = PursuitLearner(
-            gamma_learning_rate=gamma_learning_rate,
-            lambda_smoothing=lambda_smothing,
-            tau_lexicalization=threshold,
-            sample=pursuit_sampling,
-        )
-        learner.observe(test_curriculum)
-        p, r, f = learner.evaluate(test_verification)
-        test_precision += p
-        test_recall += r
-        test_f_score += f
+    # train and evaluate the learner on the training data
+    train_job = {
+        "learner": "pursuit",
+        "params": params,
+        "curriculum": "train",
+        "replicates": num_iterations,
+    }
+    for result in run_job(train_job):
+        train_precision += result["precision"]
+        train_recall += result["recall"]
+        train_f_score += result["f_score"]
+    # train and evaluate the learner on the testing data
+    test_job = {
+        "learner": "pursuit",
+        "params": params,
+        "curriculum": "test",
+        "replicates": num_iterations,
+    }
+    for result in run_job(test_job):
+        test_precision += result["precision"]
+        test_recall += result["recall"]
+        test_f_score += result["f_score"]
     # average the precision, recall, and f-score for both training and testing
     train_precision = train_precision / num_iterations
     train_recall = train_recall / num_iterations
@@ -1,35 +1,35 @@
 import random
-from curricula import load_rollins
-from crosssituational import CrossSituationalLearner
-from proposebutverify import PbvLearner
-from pursuit import PursuitLearner
+from experiments.client import run_job
 import numpy as np
 
 
-def run_xsit(train, test):
+def run_xsit(shuffle_seed=None):
     """Run the Cross-Situational Learner"""
     print("Running the Cross-Situational Learning model...")
-    learner = CrossSituationalLearner()
-    learner.observe(train)
-    precision, recall, f = learner.evaluate(test)
+    job = {"learner": "xsit", "curriculum": "rollins", "shuffle_seed": shuffle_seed}
+    result = list(run_job(job))[0]
+    precision, recall, f = result["precision"], result["recall"], result["f_score"]
     print(
         f"\tprecision: {precision :.3f}, recall: {recall :.3f}, f-score: {f :.3f}"
     )
 
 
-def run_pbv(train, test, iters=1000):
+def run_pbv(shuffle_seed=None, iters=1000):
     """Run the PbV learner"""
     print("Running the Propose but Verify Learning model...")
     precisions = []
     recalls = []
     fs = []
-    for i in range(iters):
-        learner = PbvLearner()
-        learner.observe(train)
-        p, r, f = learner.evaluate(test)
-        precisions.append(p)
-        recalls.append(r)
-        fs.append(f)
+    job = {
+        "learner": "pbv",
+        "curriculum": "rollins",
+        "replicates": iters,
+        "shuffle_seed": shuffle_seed,
+    }
+    for result in run_job(job):
+        precisions.append(result["precision"])
+        recalls.append(result["recall"])
+        fs.append(result["f_score"])
     precisions = np.asarray(precisions)
     recalls = np.asarray(recalls)
     fs = np.asarray(fs)
@@ -44,7 +44,7 @@ def run_pbv(train, test, iters=1000):
     )
 
 
-def run_pursuit(train, test, iters=1000, sampling=True):
+def run_pursuit(shuffle_seed=None, iters=1000, sampling=True):
     """Run the Pursuit Learner"""
     if sampling:
         print("Running the Pursuit Learning Model with Sampling...")
@@ -53,13 +53,17 @@ def run_pursuit(train, test, iters=1000, sampling=True):
     precisions = []
     recalls = []
     fs = []
-    for i in range(iters):
-        learner = PursuitLearner(sample=sampling)
-        learner.observe(train)
-        p, r, f = learner.evaluate(test)
-        precisions.append(p)
-        recalls.append(r)
-        fs.append(f)
+    job = {
+        "learner": "pursuit",
+        "params": {"sample": sampling},
+        "curriculum": "rollins",
+        "replicates": iters,
+        "shuffle_seed": shuffle_seed,
+    }
+    for result in run_job(job):
+        precisions.append(result["precision"])
+        recalls.append(result["recall"])
+        fs.append(result["f_score"])
     precisions = np.asarray(precisions)
     recalls = np.asarray(recalls)
     fs = np.asarray(fs)
@@ -75,14 +79,13 @@ def run_pursuit(train, test, iters=1000, sampling=True):
 
 
 if __name__ == "__main__":
-    train, test = load_rollins()
-    run_pbv(train, test)
-    run_xsit(train, test)
-    run_pursuit(train, test, sampling=False)
-    run_pursuit(train, test, sampling=True)
+    run_pbv()
+    run_xsit()
+    run_pursuit(sampling=False)
+    run_pursuit(sampling=True)
     print("SHUFFLING TRAIN...")
-    random.shuffle(train)
-    run_pbv(train, test)
-    run_xsit(train, test)
-    run_pursuit(train, test, sampling=False)
-    run_pursuit(train, test, sampling=True)
+    shuffle_seed = random.randrange(2 ** 32)
+    run_pbv(shuffle_seed)
+    run_xsit(shuffle_seed)
+    run_pursuit(shuffle_seed, sampling=False)
+    run_pursuit(shuffle_seed, sampling=True)
@@ -0,0 +1,6 @@
+from experiments.server import serve
+
+# keep the curricula and a pool of worker processes warm for run_all.py, optimize_pursuit.py,
+# optimize_xsit.py, and the other experiment scripts, which connect to it when it is running
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,83 @@
+import pytest
+from crosssituational import CrossSituationalLearner, measure_batch_drift
+from curricula import load_rollins
+
+
+def test_batched_alignments_use_the_snapshot():
+    # beta*lambda = 10, and the snapshot is A(a, x) = 5, A(a, y) = 1
+    learner = CrossSituationalLearner(lambda_smoothing=1, beta=10)
+    learner._hypotheses = {"a": {"x": 5.0, "y": 1.0}}
+    learner._observe_batched([("a", ["x", "z"]), ("a", ["y", "z"])], batch_size=2)
+    # first scene: P(a|x) = 6/15 = 0.4 and P(a|z) = 1/10, so the alignments are 0.8 and 0.2
+    # second scene: P(a|y) = 2/11 and P(a|z) = 1/10, so the alignments are 20/31 and 11/31
+    assert learner._hypotheses["a"]["x"] == pytest.approx(5.8)
+    assert learner._hypotheses["a"]["y"] == pytest.approx(1 + 20 / 31)
+    assert learner._hypotheses["a"]["z"] == pytest.approx(0.2 + 11 / 31)
+
+
+def test_batched_learning_skips_batches_without_words():
+    sequential = CrossSituationalLearner()
+    sequential.observe([("a", ["x"]), ("", ["x"])])
+    batched = CrossSituationalLearner()
+    batched.observe([("a", ["x"]), ("", ["x"])], batch_size=1)
+    assert batched._hypotheses == sequential._hypotheses
+
+
+@pytest.mark.parametrize("batch_size", [0, -1])
+def test_batched_learning_rejects_invalid_sizes(batch_size):
+    learner = CrossSituationalLearner()
+    with pytest.raises(ValueError):
+        learner.observe([("a", ["x"])], batch_size=batch_size)
+
+
+def test_no_drift_with_one_word_per_batch():
+    curriculum = [("a", ["x", "y"]), ("b", ["y", "z"]), ("a", ["x", "z"])]
+    max_difference, disagreement = measure_batch_drift(curriculum, 1)
+    assert max_difference == pytest.approx(0)
+    assert disagreement == 0
+
+
+def test_words_in_one_utterance_share_a_snapshot():
+    # beta*lambda = 10, and after the first utterance A(a, x) = 1
+    curriculum = [("a", ["x"]), ("a b", ["x", "y"])]
+    sequential = CrossSituationalLearner(lambda_smoothing=1, beta=10)
+    sequential._observe_sequential(curriculum)
+    batched = CrossSituationalLearner(lambda_smoothing=1, beta=10)
+    batched._observe_batched(curriculum, batch_size=1)
+    # a sees the same table either way: P(a|x) = 2/11 and P(a|y) = 1/10
+    for learner in [sequential, batched]:
+        assert learner._hypotheses["a"]["x"] == pytest.approx(1 + 20 / 31)
+        assert learner._hypotheses["a"]["y"] == pytest.approx(11 / 31)
+    # sequentially, b sees a's alignments in the totals: P(b|x) = 1/(11 + 20/31) and
+    # P(b|y) = 1/(10 + 11/31)
+    assert sequential._hypotheses["b"]["x"] == pytest.approx(321 / 682)
+    assert sequential._hypotheses["b"]["y"] == pytest.approx(361 / 682)
+    # batched, b shares a's snapshot: P(b|x) = 1/11 and P(b|y) = 1/10
+    assert batched._hypotheses["b"]["x"] == pytest.approx(10 / 21)
+    assert batched._hypotheses["b"]["y"] == pytest.approx(11 / 21)
+    max_difference, _ = measure_batch_drift(curriculum, 1)
+    assert max_difference > 0
+
+
+def test_one_utterance_per_batch_drifts_on_real_utterances():
+    curriculum, _ = load_rollins()
+    max_difference, disagreement = measure_batch_drift(curriculum, 1)
+    assert max_difference > 1
+    assert 0 < disagreement < 0.2
+
+
+def test_out_of_core_storage_matches_in_memory_exactly():
+    curriculum, _ = load_rollins()
+    in_memory = CrossSituationalLearner()
+    out_of_core = CrossSituationalLearner(cache_size=1)
+    for part in [curriculum[:100], curriculum[100:]]:
+        in_memory.observe(part)
+        out_of_core.observe(part)
+        assert out_of_core._hypotheses == in_memory._hypotheses
+        assert list(out_of_core._hypotheses) == list(in_memory._hypotheses)
+
+
+def test_out_of_core_storage_rejects_mini_batches():
+    learner = CrossSituationalLearner(cache_size=10)
+    with pytest.raises(ValueError):
+        learner.observe([("a", ["x"])], batch_size=1)
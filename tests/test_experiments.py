@@ -0,0 +1,96 @@
+import json
+import os
+import socket
+import threading
+import pytest
+from experiments import validate_job
+from experiments.client import submit
+from experiments.server import ExperimentServer, default_socket_path
+
+
+@pytest.mark.parametrize(
+    "job",
+    [
+        [1, 2],
+        {"learner": "xsit", "replicates": "3"},
+        {"learner": "xsit", "replicates": 0},
+        {"learner": "xsit", "replicates": True},
+        {"learner": "xsit", "params": [1]},
+        {"learner": "nope"},
+        {"learner": "xsit", "curriculum": "nope"},
+        {"learner": "pursuit", "options": {"batch_size": 1}},
+        {"learner": "pbv", "options": {"num_shards": 0}},
+        {"learner": "pbv", "options": {"num_shards": "2"}},
+        {"learner": "xsit", "options": {"batch_size": True}},
+        {"learner": "xsit", "options": {"batch_size": 2.5}},
+        {"learner": "xsit", "shuffle_seed": "1"},
+        {"learner": "xsit", "params": {"nope": 1}},
+        {"learner": "xsit", "params": {"self": 1}},
+    ],
+)
+def test_invalid_jobs_are_rejected(job):
+    with pytest.raises(ValueError):
+        validate_job(job)
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "experiments.sock")
+    server = ExperimentServer(socket_path, num_processes=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_reports_invalid_jobs(server):
+    for job in [[1, 2], {"learner": "xsit", "replicates": "3"}]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(server.server_address)
+            connection.sendall((json.dumps(job) + "\n").encode())
+            message = json.loads(connection.makefile("r").readline())
+        assert "error" in message
+    with pytest.raises(RuntimeError):
+        list(submit({"learner": "nope"}, server.server_address))
+
+
+def test_server_runs_jobs(server):
+    results = list(submit({"learner": "xsit", "curriculum": "test"}, server.server_address))
+    assert len(results) == 1
+    assert set(results[0]) == {"replicate", "precision", "recall", "f_score"}
+
+
+@pytest.mark.parametrize("num_shards", [1, 2])
+def test_server_runs_sharded_jobs(server, num_shards):
+    job = {"learner": "pbv", "curriculum": "test", "options": {"num_shards": num_shards}}
+    results = list(submit(job, server.server_address))
+    assert len(results) == 1
+    assert 0 <= results[0]["f_score"] <= 1
+
+
+def test_second_server_does_not_take_over_a_live_socket(server):
+    with pytest.raises(RuntimeError):
+        ExperimentServer(server.server_address, num_processes=1)
+    assert os.path.exists(server.server_address)
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    socket_path = str(tmp_path / "experiments.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    server = ExperimentServer(socket_path, num_processes=1)
+    server.server_close()
+
+
+def test_default_socket_is_private(tmp_path, monkeypatch):
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    socket_path = default_socket_path()
+    directory = os.path.dirname(socket_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    # a directory other users can get into is not trusted
+    os.chmod(directory, 0o777)
+    with pytest.raises(RuntimeError):
+        default_socket_path()
@@ -0,0 +1,57 @@
+from functools import partial
+from proposebutverify import PbvLearner, _given_curriculum, _shard_of, shard_pool
+
+
+CURRICULUM = [
+    ("a b c", ["X", "Y"]),
+    ("a a", ["X"]),
+    ("b d", ["Y", "Z"]),
+    ("c", ["Z"]),
+]
+
+
+def test_shards_are_stable_and_in_range():
+    for word in ["a", "b", "c", "d", "ball", "ünïcode"]:
+        assert 0 <= _shard_of(word, 3) < 3
+        assert _shard_of(word, 3) == _shard_of(word, 3)
+    # crc32 of "a" is 0xe8b7be43, so this doesn't depend on the process's hash seed
+    assert _shard_of("a", 7) == 0xE8B7BE43 % 7
+
+
+def test_sharded_learning_is_deterministic_given_a_seed():
+    with shard_pool(partial(_given_curriculum, CURRICULUM), 2) as pool:
+        first = PbvLearner()
+        first.observe_sharded(CURRICULUM, num_shards=2, seed=1, pool=pool, curriculum_key=0)
+        second = PbvLearner()
+        second.observe_sharded(CURRICULUM, num_shards=2, seed=1, pool=pool, curriculum_key=0)
+    assert first._hypotheses == second._hypotheses
+    assert first._verified == second._verified
+    assert set(first._hypotheses) == {"a", "b", "c", "d"}
+
+
+def test_sharded_learning_matches_learning_each_shard_on_its_own():
+    # a word's hypothesis only depends on its own scenes, so with alpha = alpha_0 = 1
+    # a word seen only in scenes with one object always ends up with that object
+    curriculum = [("a b", ["X"]), ("c", ["Y"]), ("a c", ["X", "Y"]), ("b", ["X"])]
+    learner = PbvLearner()
+    learner.observe_sharded(curriculum, num_shards=3, seed=0)
+    assert learner._hypotheses["b"] == "X"
+    assert learner._verified >= {"a", "b", "c"}
+
+
+def test_sharded_learning_continues_from_existing_state():
+    learner = PbvLearner()
+    learner._hypotheses = {"x": "a", "y": "c"}
+    learner._verified = {"x", "y"}
+    learner.observe_sharded([("x", ["b"])], num_shards=2)
+    # x's verified meaning isn't in the scene, so it is replaced and no longer verified
+    assert learner._hypotheses == {"x": "b", "y": "c"}
+    assert learner._verified == {"y"}
+
+
+def test_one_shard_is_learned_in_process():
+    learner = PbvLearner()
+    learner._hypotheses = {"x": "a"}
+    learner.observe_sharded([("x", ["a", "b"])], num_shards=1)
+    assert learner._hypotheses == {"x": "a"}
+    assert learner._verified == {"x"}
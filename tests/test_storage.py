@@ -0,0 +1,38 @@
+from crosssituational.storage import AssociationStore
+
+
+def test_columns_survive_eviction_and_sum_in_word_order():
+    store = AssociationStore(1.0, cache_size=4)
+    try:
+        words = [store.index_word(word) for word in ["a", "b", "c"]]
+        for meaning in ["x", "y", "z"]:
+            # add the later words first, to check that the totals still follow word order
+            for word_index in reversed(words):
+                store.add(word_index, meaning, 0.25 * (word_index + 1))
+        store.add(words[0], "x", 1.0)
+        assert store.get(words[0], "x") == 1.25
+        assert store.get(words[2], "y") == 0.75
+        assert store.get(words[1], "w") is None
+        assert store.total("x") == ((1.0 + 1.25) + 0.5) + 0.75
+        assert store.total("w") == 1.0
+        expected = [
+            (word, meaning, store.get(store.index_word(word), meaning), store.total(meaning))
+            for word in ["a", "b", "c"]
+            for meaning in ["x", "y", "z"]
+        ]
+        assert sorted(store.items()) == sorted(expected)
+    finally:
+        store.close()
+
+
+def test_most_recently_used_column_is_kept_whole():
+    store = AssociationStore(0.0, cache_size=2)
+    for i in range(5):
+        store.add(store.index_word(str(i)), "m", 1.0)
+    # the one column is bigger than the cache, but it is never evicted
+    assert store._cached_entries == 5
+    assert list(store._cache) == ["m"]
+    store.add(store.index_word("0"), "n", 1.0)
+    assert list(store._cache) == ["n"]
+    assert store.total("m") == 5.0
+    store.close()